@@ -0,0 +1,242 @@
+import sqlite3
+import threading
+import time
+
+EVENT_TYPES = ('view', 'apply', 'save')
+ROLLUP_BATCH_SIZE = 50000
+ROLLUP_INTERVAL = 60
+ROLLUP_TIME_BUDGET = 1.0
+# Folded events are kept this long for inspection, then deleted; the daily
+# rollup is kept for good, the hourly one only as far back as it is queried
+EVENT_RETENTION_DAYS = 7
+HOURLY_RETENTION_DAYS = 30
+
+ROLLUP_TABLES = {
+    'hour': ('job_stats_hourly', "strftime('%Y-%m-%d %H:00:00', created_at)"),
+    'day': ('job_stats_daily', "date(created_at)")
+}
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+# Database initialization
+def init_analytics_tables(cursor):
+    # Append-only event log; the rollup tables are derived from it
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            job_id INTEGER NOT NULL,
+            company_id INTEGER,
+            user_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES jobs (id)
+        )
+    ''')
+
+    for table, _ in ROLLUP_TABLES.values():
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS %s (
+                job_id INTEGER NOT NULL,
+                company_id INTEGER,
+                bucket TEXT NOT NULL,
+                views INTEGER DEFAULT 0,
+                applies INTEGER DEFAULT 0,
+                saves INTEGER DEFAULT 0,
+                PRIMARY KEY (job_id, bucket)
+            )
+        ''' % table)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_%s_company ON %s (company_id, bucket)' % (table, table))
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_stats_hourly_bucket ON job_stats_hourly (bucket)')
+
+    # High-water mark of events already folded into the rollups
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_event_id INTEGER DEFAULT 0,
+            refreshed_at TIMESTAMP
+        )
+    ''')
+
+    cursor.execute("SELECT 1 FROM rollup_state WHERE name = 'job_stats'")
+    if cursor.fetchone() is None:
+        # First run: seed the log with the applies and saves we already know about.
+        # Databases from before job applications have no job_id to attribute them to.
+        cursor.execute('PRAGMA table_info(applications)')
+        if 'job_id' in {row[1] for row in cursor.fetchall()}:
+            cursor.execute('''
+                INSERT INTO job_events (event_type, job_id, company_id, user_id, created_at)
+                SELECT 'apply', a.job_id, j.company_id, a.user_id, a.applied_date
+                FROM applications a JOIN jobs j ON a.job_id = j.id
+                ORDER BY a.applied_date
+            ''')
+        cursor.execute('''
+            INSERT INTO job_events (event_type, job_id, company_id, user_id, created_at)
+            SELECT 'save', s.job_id, j.company_id, s.user_id, s.saved_date
+            FROM saved_jobs s JOIN jobs j ON s.job_id = j.id
+            ORDER BY s.saved_date
+        ''')
+        cursor.execute("INSERT INTO rollup_state (name, last_event_id) VALUES ('job_stats', 0)")
+
+
+# Event recording
+def record_event(cursor, event_type, job_id, user_id=None):
+    # Runs on the caller's cursor so the event commits with the write it describes
+    cursor.execute('''
+        INSERT INTO job_events (event_type, job_id, company_id, user_id)
+        SELECT ?, id, company_id, ? FROM jobs WHERE id = ?
+    ''', (event_type, user_id, job_id))
+
+
+# Rollup refresh
+def refresh_rollups(db_path, batch_size=ROLLUP_BATCH_SIZE):
+    # Folds at most batch_size new events into the hourly and daily tables.
+    # The watermark moves in the same transaction, so each event counts once.
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute("SELECT last_event_id FROM rollup_state WHERE name = 'job_stats'")
+        last_id = cursor.fetchone()[0]
+        cursor.execute('''
+            SELECT MAX(id) FROM (
+                SELECT id FROM job_events WHERE id > ? ORDER BY id LIMIT ?
+            )
+        ''', (last_id, batch_size))
+        upper_id = cursor.fetchone()[0]
+        if upper_id is None:
+            conn.rollback()
+            return 0
+
+        for table, bucket_expr in ROLLUP_TABLES.values():
+            cursor.execute('''
+                INSERT INTO %s (job_id, company_id, bucket, views, applies, saves)
+                SELECT job_id, company_id, %s,
+                       SUM(event_type = 'view'), SUM(event_type = 'apply'), SUM(event_type = 'save')
+                FROM job_events
+                WHERE id > ? AND id <= ?
+                GROUP BY job_id, company_id, 3
+                ON CONFLICT (job_id, bucket) DO UPDATE SET
+                    views = views + excluded.views,
+                    applies = applies + excluded.applies,
+                    saves = saves + excluded.saves
+            ''' % (table, bucket_expr), (last_id, upper_id))
+
+        cursor.execute('''
+            UPDATE rollup_state SET last_event_id = ?, refreshed_at = CURRENT_TIMESTAMP
+            WHERE name = 'job_stats'
+        ''', (upper_id,))
+
+        # Retention: look at no more than one batch of the oldest folded events, so
+        # pruning keeps pace with folding without scanning the whole log
+        cursor.execute('''
+            DELETE FROM job_events
+            WHERE id IN (SELECT id FROM job_events WHERE id <= ? ORDER BY id LIMIT ?)
+              AND created_at < datetime('now', ?)
+        ''', (upper_id, batch_size, '-%d days' % EVENT_RETENTION_DAYS))
+        cursor.execute("DELETE FROM job_stats_hourly WHERE bucket < strftime('%Y-%m-%d %H:00:00', 'now', ?)",
+                       ('-%d days' % HOURLY_RETENTION_DAYS,))
+        conn.commit()
+        return upper_id - last_id
+    finally:
+        conn.close()
+
+
+def maybe_refresh_rollups(db_path, interval=ROLLUP_INTERVAL, budget=ROLLUP_TIME_BUDGET):
+    # Called from read paths: once per interval per process, folds batches until
+    # caught up or out of time. A backlog left over is resumed by the next call
+    # instead of waiting out the interval, so lag stays bounded under load.
+    global _last_refresh
+    if time.monotonic() - _last_refresh < interval:
+        return 0
+    if not _refresh_lock.acquire(blocking=False):
+        return 0
+    try:
+        started = time.monotonic()
+        _last_refresh = started
+        folded = 0
+        while True:
+            count = refresh_rollups(db_path)
+            folded += count
+            if count < ROLLUP_BATCH_SIZE:
+                break
+            if time.monotonic() - started >= budget:
+                _last_refresh = 0.0
+                break
+        return folded
+    finally:
+        _refresh_lock.release()
+
+
+# Queries
+def _series(cursor, granularity, where, params, since):
+    table, _ = ROLLUP_TABLES[granularity]
+    cursor.execute('''
+        SELECT bucket, SUM(views), SUM(applies), SUM(saves)
+        FROM %s
+        WHERE %s AND bucket >= ?
+        GROUP BY bucket
+        ORDER BY bucket
+    ''' % (table, where), params + (since,))
+    series = []
+    totals = {'views': 0, 'applies': 0, 'saves': 0}
+    for bucket, views, applies, saves in cursor.fetchall():
+        series.append({
+            'bucket': bucket,
+            'views': views,
+            'applies': applies,
+            'saves': saves,
+            'conversion_rate': round(applies / views, 4) if views else None
+        })
+        totals['views'] += views
+        totals['applies'] += applies
+        totals['saves'] += saves
+    totals['conversion_rate'] = round(totals['applies'] / totals['views'], 4) if totals['views'] else None
+    return totals, series
+
+
+def _since(cursor, granularity, days):
+    if granularity == 'hour':
+        cursor.execute("SELECT strftime('%Y-%m-%d %H:00:00', 'now', ?)", ('-%d days' % days,))
+    else:
+        cursor.execute("SELECT date('now', ?)", ('-%d days' % days,))
+    return cursor.fetchone()[0]
+
+
+def job_stats(db_path, job_id, granularity='day', days=30):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    since = _since(cursor, granularity, days)
+    totals, series = _series(cursor, granularity, 'job_id = ?', (job_id,), since)
+    conn.close()
+    return totals, series
+
+
+def company_stats(db_path, company_id, granularity='day', days=30):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    since = _since(cursor, granularity, days)
+    totals, series = _series(cursor, granularity, 'company_id = ?', (company_id,), since)
+
+    # Per-job breakdown over the same window, from the daily rollup
+    cursor.execute('''
+        SELECT s.job_id, j.title, SUM(s.views), SUM(s.applies), SUM(s.saves)
+        FROM job_stats_daily s
+        JOIN jobs j ON s.job_id = j.id
+        WHERE s.company_id = ? AND s.bucket >= date('now', ?)
+        GROUP BY s.job_id
+        ORDER BY SUM(s.applies) DESC, SUM(s.views) DESC
+    ''', (company_id, '-%d days' % days))
+    jobs = []
+    for job_id, title, views, applies, saves in cursor.fetchall():
+        jobs.append({
+            'job_id': job_id,
+            'title': title,
+            'views': views,
+            'applies': applies,
+            'saves': saves,
+            'conversion_rate': round(applies / views, 4) if views else None
+        })
+    conn.close()
+    return totals, series, jobs
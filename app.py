@@ -1,21 +1,117 @@
-from flask import Flask, request, jsonify, render_template_string, session
+from flask import Flask, Blueprint, current_app, request, jsonify, render_template_string, session
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 import sqlite3
 import hashlib
 import os
 from datetime import datetime
+import gc
+import math
 import re
-import bcrypt
+import time
+from uploads import UploadError, MAX_RESUME_SIZE, init_upload_tables, store_resume, enqueue_resume, resume_pending_jobs, maybe_resume_pending_jobs
+from analytics import HOURLY_RETENTION_DAYS, init_analytics_tables, record_event, maybe_refresh_rollups, job_stats, company_stats
+from ratelimit import MemoryBackend, SQLiteBackend, RateLimiter, SingleFlight, limited, ip_key
+from db_routing import ReadRouter
+from job_ranges import SALARY_PERIODS, annualize, normalize_job_fields, init_range_columns, backfill_job_ranges
 
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
-CORS(app)
+bp = Blueprint('portal', __name__)
+
+ASSETS = ('portal.html', 'job-card.js')
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+MOBILE_PATTERN = re.compile(r'^[6-9]\d{9}$')
+
+# App factory
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production'),
+        DATABASE=os.environ.get('DATABASE', '12thfailjobs.db'),
+        # Reject oversized uploads before the body is read (resume plus form fields)
+        MAX_CONTENT_LENGTH=MAX_RESUME_SIZE + 64 * 1024,
+        # 'memory' is per process, 'sqlite' shares buckets between workers on one host
+        RATE_LIMIT_BACKEND=os.environ.get('RATE_LIMIT_BACKEND', 'memory'),
+        RATE_LIMIT_DB=os.environ.get('RATE_LIMIT_DB', 'ratelimit.db'),
+        READ_REPLICA=os.environ.get('READ_REPLICA'),
+        READ_MAX_STALENESS=float(os.environ.get('READ_MAX_STALENESS', 30)),
+        READ_REFRESH_INTERVAL=float(os.environ.get('READ_REFRESH_INTERVAL', 10)),
+        # Set when a master process builds the app once and forks workers from it
+        PRELOAD=os.environ.get('PRELOAD') == '1'
+    )
+    if 'READ_SNAPSHOT' in os.environ:
+        app.config['READ_SNAPSHOT'] = None if os.environ['READ_SNAPSHOT'] == 'off' else os.environ['READ_SNAPSHOT']
+    if config:
+        app.config.update(config)
+    if 'READ_SNAPSHOT' not in app.config:
+        # Kept next to and named after the primary, so apps on different
+        # databases never read each other's copy
+        database = app.config['DATABASE']
+        name = os.path.splitext(os.path.basename(database))[0]
+        app.config['READ_SNAPSHOT'] = os.path.join(os.path.dirname(database), 'snapshots', '%s-read.db' % name)
+    CORS(app)
+
+    # Schema check runs once per app, i.e. once in the master when preloading
+    init_db(app.config['DATABASE'])
+
+    if app.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+        rate_limit_backend = SQLiteBackend(app.config['RATE_LIMIT_DB'])
+    else:
+        rate_limit_backend = MemoryBackend()
+    app.extensions['rate_limiters'] = {
+        'search': RateLimiter(rate_limit_backend, 'search', rate=5, capacity=30),
+        'login': RateLimiter(rate_limit_backend, 'login', rate=5 / 60, capacity=5)
+    }
+    app.extensions['search_flight'] = SingleFlight()
+
+    # Read routing: read-only endpoints use a periodically refreshed snapshot (or a
+    # designated replica file) of the primary, within a staleness bound
+    app.extensions['read_router'] = ReadRouter(
+        app.config['DATABASE'],
+        snapshot=app.config['READ_SNAPSHOT'],
+        replica=app.config['READ_REPLICA'],
+        max_staleness=app.config['READ_MAX_STALENESS'],
+        refresh_interval=app.config['READ_REFRESH_INTERVAL']
+    )
+
+    app.extensions['assets'] = load_assets()
+    app.register_blueprint(bp)
+
+    if app.config['PRELOAD']:
+        warm_up(app)
+    return app
+
+def load_assets():
+    assets = {}
+    for name in ASSETS:
+        if os.path.exists(name):
+            with open(name, 'r', encoding='utf-8') as f:
+                assets[name] = f.read()
+    return assets
+
+def warm_up(app):
+    # Do once in the master what every worker would otherwise repeat after fork
+    import bcrypt
+    # Modules the resume pool needs; the pool itself is started lazily in each worker
+    import concurrent.futures.process
+    import multiprocessing.forkserver
+    import multiprocessing.popen_forkserver
+    app.extensions['read_router'].refresh_snapshot()
+    # Keep everything allocated so far out of the cyclic GC, so collections in the
+    # workers don't write to (and thereby copy) pages shared with the master
+    gc.freeze()
 
 # Database initialization
-def init_db():
-    conn = sqlite3.connect('12thfailjobs.db')
+def init_db(db_path='12thfailjobs.db'):
+    conn = sqlite3.connect(db_path, timeout=60)
     cursor = conn.cursor()
     
+    # WAL lets readers, including the read snapshot's backup, run alongside writers
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
+    # Workers that start together each run this; holding the write lock from here
+    # to the commit makes every check-then-create below see the others' changes
+    cursor.execute('BEGIN IMMEDIATE')
+    
     # Create users table with enhanced fields
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -81,11 +177,18 @@ def init_db():
             views INTEGER DEFAULT 0,
             applications_count INTEGER DEFAULT 0,
             posted_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            salary_annual_min INTEGER,
+            salary_annual_max INTEGER,
+            experience_min_months INTEGER,
+            experience_max_months INTEGER,
             FOREIGN KEY (company_id) REFERENCES companies (id),
             FOREIGN KEY (category_id) REFERENCES job_categories (id)
         )
     ''')
     
+    # Add normalized salary/experience columns and their range indexes
+    backfill_pending = init_range_columns(cursor)
+    
     # Create applications table with enhanced fields
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS applications (
@@ -120,6 +223,12 @@ def init_db():
         )
     ''')
     
+    # Create resume storage and processing queue tables
+    init_upload_tables(cursor)
+    
+    # Create analytics event log and rollup tables
+    init_analytics_tables(cursor)
+    
     # Insert default categories
     default_categories = [
         ('Technology', 'IT and software development jobs', 'fas fa-laptop-code', '#e63946'),
@@ -166,46 +275,89 @@ def init_db():
     cursor.execute('SELECT COUNT(*) FROM jobs')
     if cursor.fetchone()[0] == 0:
         cursor.executemany('''
-            INSERT INTO jobs (title, company_id, category_id, location, salary_min, salary_max, salary_type, job_type, experience_level, description, requirements, benefits, is_active, is_featured) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', sample_jobs)
+            INSERT INTO jobs (title, company_id, category_id, location, salary_min, salary_max, salary_type, job_type, experience_level, description, requirements, benefits, is_active, is_featured,
+                              salary_annual_min, salary_annual_max, experience_min_months, experience_max_months) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [job + normalize_job_fields(job[4], job[5], job[6], job[8]) for job in sample_jobs])
     
     conn.commit()
     conn.close()
+    
+    # Existing jobs get their normalized columns filled in batches, resuming
+    # on later starts until the backfill has run to completion; only one process
+    # on the host runs it, the rest start serving straight away
+    if backfill_pending:
+        backfill_job_ranges(db_path)
 
 # Helper functions
 def hash_password(password):
+    # bcrypt is only needed by signup and login, so it is imported on first use
+    import bcrypt
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def verify_password(password, hashed):
+    import bcrypt
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
 def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.match(email) is not None
 
 def validate_mobile(mobile):
-    pattern = r'^[6-9]\d{9}$'
-    return re.match(pattern, mobile) is not None
+    return MOBILE_PATTERN.match(mobile) is not None
+
+def parse_filter_number(value):
+    # Form inputs arrive as strings; an empty field means no filter
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    number = float(value)
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(value)
+    return number
+
+def get_db():
+    return sqlite3.connect(current_app.config['DATABASE'])
+
+def read_router():
+    return current_app.extensions['read_router']
+
+def read_db():
+    return read_router().choose(session.get('last_write'))
+
+def mark_write():
+    # Keeps this session on the primary until a newer snapshot exists
+    session['last_write'] = time.time()
 
 # Routes
-@app.route('/')
+def get_asset(name):
+    # Served from memory; re-read from disk in debug mode so edits show up
+    if current_app.debug:
+        return load_assets().get(name)
+    return current_app.extensions['assets'].get(name)
+
+@bp.before_app_request
+def drain_resume_jobs():
+    # Retries failed extractions and picks up jobs orphaned by a dead worker
+    maybe_resume_pending_jobs(current_app.config['DATABASE'])
+
+@bp.route('/')
 def index():
-    if os.path.exists('portal.html'):
-        with open('portal.html', 'r', encoding='utf-8') as f:
-            return f.read(), 200, {'Content-Type': 'text/html; charset=utf-8'}
+    portal = get_asset('portal.html')
+    if portal is not None:
+        return portal, 200, {'Content-Type': 'text/html; charset=utf-8'}
     else:
         return 'Portal HTML not found'
 
-@app.route('/job-card.js')
+@bp.route('/job-card.js')
 def job_card_js():
-    if os.path.exists('job-card.js'):
-        with open('job-card.js', 'r', encoding='utf-8') as f:
-            return f.read(), 200, {'Content-Type': 'application/javascript; charset=utf-8'}
+    job_card = get_asset('job-card.js')
+    if job_card is not None:
+        return job_card, 200, {'Content-Type': 'application/javascript; charset=utf-8'}
     else:
         return 'Job card JS not found', 404
 
-@app.route('/signup', methods=['POST'])
+@bp.route('/signup', methods=['POST'])
 def signup():
     try:
         data = request.get_json()
@@ -224,7 +376,7 @@ def signup():
             return jsonify({'success': False, 'error': 'Password must be at least 6 characters long'}), 400
         
         # Check for duplicate email
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT id FROM users WHERE email = ?', (email,))
         if cursor.fetchone():
@@ -243,7 +395,8 @@ def signup():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/login', methods=['POST'])
+@bp.route('/login', methods=['POST'])
+@limited('login', key_func=ip_key)
 def login():
     try:
         data = request.get_json()
@@ -255,7 +408,7 @@ def login():
             return jsonify({'success': False, 'error': 'Email and password are required'}), 400
         
         # Check credentials
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT id, name, password FROM users WHERE email = ?', (email,))
         user = cursor.fetchone()
@@ -280,12 +433,12 @@ def login():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/logout', methods=['POST'])
+@bp.route('/logout', methods=['POST'])
 def logout():
     session.clear()
     return jsonify({'success': True, 'message': 'Logged out successfully'}), 200
 
-@app.route('/check-auth', methods=['GET'])
+@bp.route('/check-auth', methods=['GET'])
 def check_auth():
     if 'user_id' in session:
         return jsonify({
@@ -297,7 +450,7 @@ def check_auth():
         }), 200
     return jsonify({'success': False, 'user': None}), 200
 
-@app.route('/submit-application', methods=['POST'])
+@bp.route('/submit-application', methods=['POST'])
 def submit_application():
     try:
         data = request.get_json()
@@ -314,7 +467,7 @@ def submit_application():
             return jsonify({'success': False, 'error': 'Please enter a valid 10-digit mobile number starting with 6-9'}), 400
         
         # Check for duplicate mobile
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT id FROM applications WHERE mobile = ?', (mobile,))
         if cursor.fetchone():
@@ -332,10 +485,10 @@ def submit_application():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/view-applications', methods=['GET'])
+@bp.route('/view-applications', methods=['GET'])
 def view_applications():
     try:
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM applications ORDER BY timestamp DESC')
         applications = cursor.fetchall()
@@ -403,7 +556,85 @@ def view_applications():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/search-jobs', methods=['POST'])
+def run_job_search(db, query, category_id, location, job_type, salary_min, salary_max, salary_type, experience_years):
+    conn = read_router().connect(db)
+    cursor = conn.cursor()
+    
+    # Build the query
+    sql = '''
+        SELECT j.id, j.title, j.location, j.salary_min, j.salary_max, j.salary_type, 
+               j.job_type, j.experience_level, j.description, j.is_featured, j.posted_date,
+               c.name as company_name, c.logo as company_logo,
+               cat.name as category_name, cat.icon as category_icon
+        FROM jobs j
+        JOIN companies c ON j.company_id = c.id
+        JOIN job_categories cat ON j.category_id = cat.id
+        WHERE j.is_active = 1
+    '''
+    params = []
+    
+    if query:
+        sql += ' AND (j.title LIKE ? OR j.description LIKE ? OR c.name LIKE ?)'
+        params.extend([f'%{query}%', f'%{query}%', f'%{query}%'])
+    
+    if category_id:
+        sql += ' AND j.category_id = ?'
+        params.append(category_id)
+    
+    if location:
+        sql += ' AND j.location LIKE ?'
+        params.append(f'%{location}%')
+    
+    if job_type:
+        sql += ' AND j.job_type = ?'
+        params.append(job_type)
+    
+    # Salary filters compare annualized amounts, so monthly and other pay periods mix correctly
+    if salary_min:
+        sql += ' AND j.salary_annual_max >= ?'
+        params.append(annualize(salary_min, salary_type))
+    
+    if salary_max:
+        sql += ' AND j.salary_annual_min <= ?'
+        params.append(annualize(salary_max, salary_type))
+    
+    # Jobs whose experience range covers the candidate's experience
+    if experience_years is not None:
+        experience_months = int(float(experience_years) * 12)
+        sql += ' AND j.experience_min_months <= ? AND (j.experience_max_months IS NULL OR j.experience_max_months >= ?)'
+        params.extend([experience_months, experience_months])
+    
+    sql += ' ORDER BY j.is_featured DESC, j.posted_date DESC'
+    
+    cursor.execute(sql, params)
+    jobs = cursor.fetchall()
+    conn.close()
+    
+    # Format results
+    results = []
+    for job in jobs:
+        results.append({
+            'id': job[0],
+            'title': job[1],
+            'location': job[2],
+            'salary_min': job[3],
+            'salary_max': job[4],
+            'salary_type': job[5],
+            'job_type': job[6],
+            'experience_level': job[7],
+            'description': job[8],
+            'is_featured': bool(job[9]),
+            'posted_date': job[10],
+            'company_name': job[11],
+            'company_logo': job[12],
+            'category_name': job[13],
+            'category_icon': job[14]
+        })
+    
+    return results
+
+@bp.route('/search-jobs', methods=['POST'])
+@limited('search')
 def search_jobs():
     try:
         data = request.get_json()
@@ -411,75 +642,23 @@ def search_jobs():
         category_id = data.get('category_id')
         location = data.get('location', '').strip()
         job_type = data.get('job_type')
-        salary_min = data.get('salary_min')
-        salary_max = data.get('salary_max')
-        
-        conn = sqlite3.connect('12thfailjobs.db')
-        cursor = conn.cursor()
-        
-        # Build the query
-        sql = '''
-            SELECT j.id, j.title, j.location, j.salary_min, j.salary_max, j.salary_type, 
-                   j.job_type, j.experience_level, j.description, j.is_featured, j.posted_date,
-                   c.name as company_name, c.logo as company_logo,
-                   cat.name as category_name, cat.icon as category_icon
-            FROM jobs j
-            JOIN companies c ON j.company_id = c.id
-            JOIN job_categories cat ON j.category_id = cat.id
-            WHERE j.is_active = 1
-        '''
-        params = []
-        
-        if query:
-            sql += ' AND (j.title LIKE ? OR j.description LIKE ? OR c.name LIKE ?)'
-            params.extend([f'%{query}%', f'%{query}%', f'%{query}%'])
-        
-        if category_id:
-            sql += ' AND j.category_id = ?'
-            params.append(category_id)
-        
-        if location:
-            sql += ' AND j.location LIKE ?'
-            params.append(f'%{location}%')
+        salary_type = data.get('salary_type', 'monthly')
         
-        if job_type:
-            sql += ' AND j.job_type = ?'
-            params.append(job_type)
+        if salary_type not in SALARY_PERIODS:
+            return jsonify({'success': False, 'error': 'Unknown salary type'}), 400
         
-        if salary_min:
-            sql += ' AND j.salary_max >= ?'
-            params.append(salary_min)
+        try:
+            salary_min = parse_filter_number(data.get('salary_min'))
+            salary_max = parse_filter_number(data.get('salary_max'))
+            experience_years = parse_filter_number(data.get('experience_years'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'Salary and experience filters must be non-negative numbers'}), 400
         
-        if salary_max:
-            sql += ' AND j.salary_min <= ?'
-            params.append(salary_max)
-        
-        sql += ' ORDER BY j.is_featured DESC, j.posted_date DESC'
-        
-        cursor.execute(sql, params)
-        jobs = cursor.fetchall()
-        conn.close()
-        
-        # Format results
-        results = []
-        for job in jobs:
-            results.append({
-                'id': job[0],
-                'title': job[1],
-                'location': job[2],
-                'salary_min': job[3],
-                'salary_max': job[4],
-                'salary_type': job[5],
-                'job_type': job[6],
-                'experience_level': job[7],
-                'description': job[8],
-                'is_featured': bool(job[9]),
-                'posted_date': job[10],
-                'company_name': job[11],
-                'company_logo': job[12],
-                'category_name': job[13],
-                'category_icon': job[14]
-            })
+        # Identical searches already in flight against the same copy share a single query
+        db = read_db()
+        key = repr((db, query, category_id, location, job_type, salary_min, salary_max, salary_type, experience_years))
+        results = current_app.extensions['search_flight'].do(key, lambda: run_job_search(
+            db, query, category_id, location, job_type, salary_min, salary_max, salary_type, experience_years))
         
         return jsonify({
             'success': True,
@@ -490,10 +669,19 @@ def search_jobs():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/get-categories', methods=['GET'])
+@bp.route('/rate-limit-stats', methods=['GET'])
+def rate_limit_stats():
+    limiters = current_app.extensions['rate_limiters']
+    return jsonify({
+        'success': True,
+        'limiters': {name: limiter.stats() for name, limiter in limiters.items()},
+        'search_coalescing': current_app.extensions['search_flight'].stats()
+    }), 200
+
+@bp.route('/get-categories', methods=['GET'])
 def get_categories():
     try:
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = read_router().connect(read_db())
         cursor = conn.cursor()
         cursor.execute('''
             SELECT c.id, c.name, c.description, c.icon, c.color, COUNT(j.id) as job_count
@@ -522,10 +710,10 @@ def get_categories():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/get-companies', methods=['GET'])
+@bp.route('/get-companies', methods=['GET'])
 def get_companies():
     try:
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = read_router().connect(read_db())
         cursor = conn.cursor()
         cursor.execute('''
             SELECT c.id, c.name, c.logo, c.description, c.website, c.location, 
@@ -559,13 +747,16 @@ def get_companies():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/get-job/<int:job_id>', methods=['GET'])
+@bp.route('/get-job/<int:job_id>', methods=['GET'])
 def get_job_details(job_id):
     try:
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = read_router().connect(read_db())
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT j.*, c.name as company_name, c.logo as company_logo, 
+            SELECT j.id, j.title, j.company_id, j.category_id, j.location, j.salary_min, j.salary_max,
+                   j.salary_type, j.job_type, j.experience_level, j.description, j.requirements,
+                   j.benefits, j.is_featured, j.views, j.applications_count, j.posted_date,
+                   c.name as company_name, c.logo as company_logo, 
                    c.description as company_description, c.website as company_website,
                    cat.name as category_name, cat.icon as category_icon
             FROM jobs j
@@ -580,9 +771,10 @@ def get_job_details(job_id):
             return jsonify({'success': False, 'error': 'Job not found'}), 404
         
         # Increment view count
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('UPDATE jobs SET views = views + 1 WHERE id = ?', (job_id,))
+        record_event(cursor, 'view', job_id, session.get('user_id'))
         conn.commit()
         conn.close()
         
@@ -617,22 +809,31 @@ def get_job_details(job_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/apply-job', methods=['POST'])
+@bp.route('/apply-job', methods=['POST'])
 def apply_job():
     try:
         if 'user_id' not in session:
             return jsonify({'success': False, 'error': 'Please login to apply'}), 401
         
-        data = request.get_json()
+        # Accept either JSON or a multipart form carrying a resume file
+        resume_file = None
+        if request.content_length and request.content_length > current_app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'success': False, 'error': 'Resume file is too large'}), 413
+        if request.mimetype == 'multipart/form-data':
+            data = request.form
+            resume_file = request.files.get('resume')
+        else:
+            data = request.get_json()
         job_id = data.get('job_id')
         experience_years = data.get('experience_years')
         expected_salary = data.get('expected_salary')
         cover_letter = data.get('cover_letter', '').strip()
+        resume_id = data.get('resume_id')
         
         if not job_id:
             return jsonify({'success': False, 'error': 'Job ID is required'}), 400
         
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if already applied
@@ -654,26 +855,122 @@ def apply_job():
             conn.close()
             return jsonify({'success': False, 'error': 'Job not found'}), 404
         
+        # Attach a resume, either uploaded with this request or previously via /upload-resume
+        resume_path = None
+        if resume_file:
+            try:
+                resume_id, resume_path, is_new_resume = store_resume(current_app.config['DATABASE'], resume_file, session['user_id'])
+            except UploadError as e:
+                conn.close()
+                return jsonify({'success': False, 'error': str(e)}), e.status
+            # Text extraction runs in the background so the response is not delayed
+            if is_new_resume:
+                enqueue_resume(current_app.config['DATABASE'], resume_id)
+        elif resume_id:
+            cursor.execute('''
+                SELECT r.path FROM resume_files r
+                JOIN user_resumes ur ON ur.resume_id = r.id
+                WHERE r.id = ? AND ur.user_id = ?
+            ''', (resume_id, session['user_id']))
+            resume = cursor.fetchone()
+            if not resume:
+                conn.close()
+                return jsonify({'success': False, 'error': 'Resume not found'}), 404
+            resume_path = resume[0]
+        
         # Insert application
         cursor.execute('''
             INSERT INTO applications (job_id, user_id, name, email, mobile, location, 
-                                   experience_years, expected_salary, cover_letter)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                   experience_years, expected_salary, cover_letter, resume_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (job_id, session['user_id'], user[0], user[1], user[2], job[0], 
-              experience_years, expected_salary, cover_letter))
+              experience_years, expected_salary, cover_letter, resume_path))
         
         # Update job applications count
         cursor.execute('UPDATE jobs SET applications_count = applications_count + 1 WHERE id = ?', (job_id,))
+        record_event(cursor, 'apply', job_id, session['user_id'])
         
         conn.commit()
         conn.close()
+        mark_write()
         
         return jsonify({'success': True, 'message': 'Application submitted successfully!'}), 201
         
+    except HTTPException:
+        # e.g. 413 from a body without a declared length that runs past the limit,
+        # answered as JSON by request_too_large
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/upload-resume', methods=['POST'])
+def upload_resume():
+    try:
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'error': 'Please login to upload a resume'}), 401
+        
+        # Fail fast on declared size before touching the body
+        if request.content_length and request.content_length > current_app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'success': False, 'error': 'Resume file is too large'}), 413
+        
+        resume_id, resume_path, is_new = store_resume(current_app.config['DATABASE'], request.files.get('resume'), session['user_id'])
+        if is_new:
+            enqueue_resume(current_app.config['DATABASE'], resume_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Resume uploaded successfully!',
+            'resume_id': resume_id
+        }), 201 if is_new else 200
+        
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.app_errorhandler(413)
+def request_too_large(e):
+    # Raised by werkzeug when a body without a declared length runs past the limit
+    return jsonify({'success': False, 'error': 'Resume file is too large'}), 413
+
+@bp.route('/resume-status/<int:resume_id>', methods=['GET'])
+def resume_status(resume_id):
+    try:
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'error': 'Please login to view resume status'}), 401
+        
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT r.id, r.original_name, r.size, r.status, r.preview, r.created_at
+            FROM resume_files r
+            JOIN user_resumes ur ON ur.resume_id = r.id
+            WHERE r.id = ? AND ur.user_id = ?
+        ''', (resume_id, session['user_id']))
+        resume = cursor.fetchone()
+        conn.close()
+        
+        if not resume:
+            return jsonify({'success': False, 'error': 'Resume not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'resume': {
+                'id': resume[0],
+                'original_name': resume[1],
+                'size': resume[2],
+                'status': resume[3],
+                'preview': resume[4],
+                'uploaded_at': resume[5]
+            }
+        }), 200
+        
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/save-job', methods=['POST'])
+@bp.route('/save-job', methods=['POST'])
 def save_job():
     try:
         if 'user_id' not in session:
@@ -685,7 +982,7 @@ def save_job():
         if not job_id:
             return jsonify({'success': False, 'error': 'Job ID is required'}), 400
         
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if already saved
@@ -698,21 +995,23 @@ def save_job():
         # Save job
         cursor.execute('INSERT INTO saved_jobs (user_id, job_id) VALUES (?, ?)', 
                       (session['user_id'], job_id))
+        record_event(cursor, 'save', job_id, session['user_id'])
         conn.commit()
         conn.close()
+        mark_write()
         
         return jsonify({'success': True, 'message': 'Job saved successfully!'}), 201
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/get-saved-jobs', methods=['GET'])
+@bp.route('/get-saved-jobs', methods=['GET'])
 def get_saved_jobs():
     try:
         if 'user_id' not in session:
             return jsonify({'success': False, 'error': 'Please login to view saved jobs'}), 401
         
-        conn = sqlite3.connect('12thfailjobs.db')
+        conn = read_router().connect(read_db())
         cursor = conn.cursor()
         cursor.execute('''
             SELECT j.id, j.title, j.location, j.salary_min, j.salary_max, j.salary_type,
@@ -754,7 +1053,59 @@ def get_saved_jobs():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/contact', methods=['POST'])
+def analytics_params():
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('hour', 'day'):
+        return None, None
+    days = request.args.get('days', 30 if granularity == 'day' else 2, type=int)
+    return granularity, max(1, min(days, 365 if granularity == 'day' else HOURLY_RETENTION_DAYS))
+
+@bp.route('/analytics/job/<int:job_id>', methods=['GET'])
+def job_analytics(job_id):
+    try:
+        granularity, days = analytics_params()
+        if not granularity:
+            return jsonify({'success': False, 'error': 'Granularity must be hour or day'}), 400
+        
+        maybe_refresh_rollups(current_app.config['DATABASE'])
+        totals, series = job_stats(current_app.config['DATABASE'], job_id, granularity, days)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'granularity': granularity,
+            'days': days,
+            'totals': totals,
+            'series': series
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/analytics/company/<int:company_id>', methods=['GET'])
+def company_analytics(company_id):
+    try:
+        granularity, days = analytics_params()
+        if not granularity:
+            return jsonify({'success': False, 'error': 'Granularity must be hour or day'}), 400
+        
+        maybe_refresh_rollups(current_app.config['DATABASE'])
+        totals, series, jobs = company_stats(current_app.config['DATABASE'], company_id, granularity, days)
+        
+        return jsonify({
+            'success': True,
+            'company_id': company_id,
+            'granularity': granularity,
+            'days': days,
+            'totals': totals,
+            'series': series,
+            'jobs': jobs
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/contact', methods=['POST'])
 def contact_us():
     try:
         data = request.get_json()
@@ -779,9 +1130,10 @@ def contact_us():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
-    init_db()
+    app = create_app()
+    resume_pending_jobs(app.config['DATABASE'])
     print("🚀 Starting 12thFailJobs Backend Server...")
-    print("📊 Database initialized: 12thfailjobs.db")
+    print("📊 Database initialized: %s" % app.config['DATABASE'])
     print("🔗 API Endpoints:")
     print("   POST /signup - User registration")
     print("   POST /login - User authentication")
@@ -790,5 +1142,8 @@ if __name__ == '__main__':
     print("   POST /submit-application - Submit job application")
     print("   GET  /view-applications - View all applications")
     print("   POST /search-jobs - Search jobs")
+    print("   POST /upload-resume - Upload a resume")
+    print("   GET  /analytics/job/<id> - Job views, applies and conversion")
+    print("   GET  /analytics/company/<id> - Company views, applies and conversion")
     print("🌐 Server running on: http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Run against a throwaway database
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix='12thfailjobs-bench-'))
+
+from app import create_app, run_job_search
+from job_ranges import RANGES_MIGRATION, SALARY_PERIODS, backfill_job_ranges, create_range_indexes
+
+JOBS = 1000000
+BATCH = 50000
+REPEAT = 5
+EXPERIENCE_LEVELS = ('Fresher', '0-1 years', '1-3 years', '2-5 years', '3+ years', '5-10 years', '6 months')
+RANGE_INDEXES = ('idx_jobs_category_salary_max', 'idx_jobs_category_salary_min', 'idx_jobs_salary_max',
+                 'idx_jobs_salary_min', 'idx_jobs_category_experience', 'idx_jobs_experience')
+
+# (label, category_id, salary_min, salary_max, salary_type, experience_years)
+FILTERS = (
+    ('salary >= 1.1L/month + category', 3, 110000, None, 'monthly', None),
+    ('salary <= 9k/month + category', 3, None, 9000, 'monthly', None),
+    ('salary >= 13L/year, any category', None, 1300000, None, 'yearly', None),
+    ('experience 12 years + category', 3, None, None, 'monthly', 12),
+)
+
+
+def seed_jobs(db_path):
+    # Raw rows only, as an existing database would have them before the migration
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    for start in range(0, JOBS, BATCH):
+        rows = []
+        for i in range(start, start + BATCH):
+            monthly = rng.randint(8000, 80000)
+            salary_type = rng.choice(('monthly',) * 8 + ('yearly', 'daily'))
+            # Same pay-period convention the app annualizes with
+            scale = SALARY_PERIODS['monthly'] / SALARY_PERIODS[salary_type]
+            rows.append(('Job %d' % i, i % 4 + 1, i % 8 + 1, 'City %d' % (i % 50),
+                         int(monthly * scale), int(monthly * scale * 1.4), salary_type,
+                         rng.choice(EXPERIENCE_LEVELS), 'Description %d' % i))
+        conn.executemany('''
+            INSERT INTO jobs (title, company_id, category_id, location, salary_min, salary_max, salary_type, experience_level, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    conn.close()
+
+
+def time_filters(app, label):
+    print(label)
+    with app.app_context():
+        db = app.config['DATABASE']
+        for name, category_id, salary_min, salary_max, salary_type, experience_years in FILTERS:
+            timings = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                results = run_job_search(db, '', category_id, '', None, salary_min, salary_max,
+                                         salary_type, experience_years)
+                timings.append(time.perf_counter() - start)
+            print('  %-36s %7d rows  median %8.1f ms' % (name, len(results), statistics.median(timings) * 1000))
+
+
+def drop_range_indexes(db_path):
+    conn = sqlite3.connect(db_path)
+    for name in RANGE_INDEXES:
+        conn.execute('DROP INDEX %s' % name)
+    conn.commit()
+    conn.close()
+
+
+if __name__ == '__main__':
+    app = create_app({'READ_SNAPSHOT': None})
+    db_path = app.config['DATABASE']
+    # Start from the pre-migration state: raw rows, no range indexes, backfill not done
+    drop_range_indexes(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM schema_migrations WHERE name = ?', (RANGES_MIGRATION,))
+    conn.commit()
+    conn.close()
+
+    start = time.perf_counter()
+    seed_jobs(db_path)
+    print('seeded %d jobs in %.1fs' % (JOBS, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    updated = backfill_job_ranges(db_path)
+    print('backfilled %d jobs and built range indexes in %.1fs' % (updated, time.perf_counter() - start))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('ANALYZE')
+    conn.close()
+    time_filters(app, 'with range indexes')
+
+    drop_range_indexes(db_path)
+    time_filters(app, 'without range indexes')
+
+    conn = sqlite3.connect(db_path)
+    create_range_indexes(conn.cursor())
+    conn.commit()
+    conn.close()
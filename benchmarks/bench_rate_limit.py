@@ -0,0 +1,183 @@
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Run against a throwaway database
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix='12thfailjobs-bench-'))
+
+from app import create_app
+
+EXTRA_JOBS = 20000
+DURATION = 10.0
+LEGIT_CLIENTS = 8
+LEGIT_INTERVAL = 0.25
+# Abusers fire requests on a fixed schedule without waiting for responses, as a
+# scraper farm would; closed-loop abusers would instead slow down exactly when
+# the server does, and never offer the load being measured
+ABUSIVE_RATE = 150
+# Loopback source addresses, so the server sees one address per client
+LEGIT_ADDRESS = '127.0.1.%d'
+ABUSIVE_ADDRESS = '127.0.2.1'
+
+PROFILES = (
+    ('no abuse', 'memory', False, 0),
+    ('no limit', 'memory', False, ABUSIVE_RATE),
+    ('memory backend', 'memory', True, ABUSIVE_RATE),
+    ('sqlite backend', 'sqlite', True, ABUSIVE_RATE),
+)
+
+
+def seed_jobs():
+    conn = sqlite3.connect('12thfailjobs.db')
+    conn.executemany('''
+        INSERT INTO jobs (title, company_id, category_id, location, salary_min, salary_max, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [('Job %d' % i, i % 4 + 1, i % 8 + 1, 'City %d' % (i % 50), 10000, 20000, 'Description %d' % i)
+          for i in range(EXTRA_JOBS)])
+    conn.commit()
+    conn.close()
+
+
+def serve(port, backend, limit, ready):
+    # The server gets its own process and interpreter, as a worker would
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # Reads go to the primary so every profile measures the same query path
+    app = create_app({'READ_SNAPSHOT': None, 'RATE_LIMIT_BACKEND': backend,
+                      'RATE_LIMIT_DB': 'ratelimit-%d.db' % port})
+    if not limit:
+        for limiter in app.extensions['rate_limiters'].values():
+            limiter.rate = limiter.capacity = 10 ** 9
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    ready.set()
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def post(port, source, body, timeout=30):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout, source_address=(source, 0))
+    try:
+        conn.request('POST', '/search-jobs', json.dumps(body), {'Content-Type': 'application/json'})
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status
+    finally:
+        conn.close()
+
+
+def get_stats(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('GET', '/rate-limit-stats')
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    return stats['limiters']['search']
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run_profile(label, backend, limit, abusive_rate):
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, backend, limit, ready), daemon=True)
+    server.start()
+    ready.wait()
+
+    stop = threading.Event()
+    legit_latencies = []
+    legit_errors = []
+    abusive = {'sent': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def legit(n):
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                status = post(port, LEGIT_ADDRESS % (n + 1), {'query': 'job %d' % (1000 + n)})
+            except OSError:
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                legit_latencies.append(elapsed)
+                if status != 200:
+                    legit_errors.append(status)
+            time.sleep(LEGIT_INTERVAL)
+
+    def abuser():
+        body = json.dumps({'query': 'description %d' % random.randrange(100)})
+        interval = 1 / abusive_rate
+        next_send = time.perf_counter()
+        open_sockets = []
+        while not stop.is_set():
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_send += interval
+            request = ('POST /search-jobs HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n'
+                       'Content-Length: %d\r\nConnection: close\r\n\r\n%s' % (len(body), body)).encode()
+            try:
+                sock = socket.create_connection(('127.0.0.1', port), source_address=(ABUSIVE_ADDRESS, 0))
+                sock.sendall(request)
+                open_sockets.append((time.perf_counter(), sock))
+                abusive['sent'] += 1
+            except OSError:
+                abusive['failed'] += 1
+            body = json.dumps({'query': 'description %d' % random.randrange(100)})
+            # Hang up on requests old enough that the server has answered them
+            while open_sockets and open_sockets[0][0] < time.perf_counter() - 5:
+                open_sockets.pop(0)[1].close()
+        for _, sock in open_sockets:
+            sock.close()
+
+    threads = [threading.Thread(target=legit, args=(n,)) for n in range(LEGIT_CLIENTS)]
+    if abusive_rate:
+        threads.append(threading.Thread(target=abuser))
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+    # Let the server work off what it has accepted before reading its counters
+    time.sleep(1)
+    stats = get_stats(port)
+    server.terminate()
+    server.join()
+
+    p99 = percentile(legit_latencies, 0.99)
+    print('%-16s legit p50 %7.1f ms  p99 %7.1f ms  legit errors %d  abusive sent %d failed %d  search %s' % (
+        label, percentile(legit_latencies, 0.50) * 1000, p99 * 1000, len(legit_errors),
+        abusive['sent'], abusive['failed'], stats))
+    return p99
+
+
+if __name__ == '__main__':
+    create_app({'READ_SNAPSHOT': None})
+    seed_jobs()
+    print('abusers: %d req/s open loop from one address; legit: %d clients, one search every %.2fs each' % (
+        ABUSIVE_RATE, LEGIT_CLIENTS, LEGIT_INTERVAL))
+
+    results = {}
+    for label, backend, limit, abusive_rate in PROFILES:
+        results[label] = run_profile(label, backend, limit, abusive_rate)
+
+    baseline = results['no abuse']
+    for label in ('no limit', 'memory backend', 'sqlite backend'):
+        print('%-16s legit p99 is %.1fx the no-abuse baseline' % (label, results[label] / baseline))
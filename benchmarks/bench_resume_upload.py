@@ -0,0 +1,105 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Run against a throwaway database and upload folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix='12thfailjobs-bench-'))
+
+import uploads
+from app import create_app
+
+RESUME_SIZE = 2 * 1024 * 1024
+THREADS = 8
+UPLOADS_PER_THREAD = 10
+
+
+def make_resume(seed):
+    # Unique content per upload so deduplication does not short-circuit the copy
+    header = ('resume %d\n' % seed).encode('utf-8')
+    return header + os.urandom(RESUME_SIZE - len(header))
+
+
+def login(client, n):
+    email = 'bench%d@example.com' % n
+    client.post('/signup', json={'name': 'Bench %d' % n, 'email': email, 'password': 'benchpass'})
+    client.post('/login', json={'email': email, 'password': 'benchpass'})
+
+
+def written_bytes():
+    # Bytes this process has passed to write(); Linux only
+    try:
+        with open('/proc/self/io') as f:
+            return int(dict(line.split(': ') for line in f.read().splitlines())['wchar'])
+    except OSError:
+        return None
+
+
+def bench_memory():
+    # Through the endpoint, with the request body read from disk, so the peak is
+    # what the server holds per upload rather than the benchmark's own copy
+    client = app.test_client()
+    login(client, -1)
+    boundary = 'benchboundary'
+    with open('upload.bin', 'wb') as f:
+        f.write(('--%s\r\nContent-Disposition: form-data; name="resume"; filename="resume.pdf"\r\n'
+                 'Content-Type: application/pdf\r\n\r\n' % boundary).encode('utf-8'))
+        f.write(make_resume(-1))
+        f.write(('\r\n--%s--\r\n' % boundary).encode('utf-8'))
+    size = os.path.getsize('upload.bin')
+
+    with open('upload.bin', 'rb') as body:
+        before = written_bytes()
+        tracemalloc.start()
+        resp = client.post('/upload-resume', input_stream=body, content_length=size,
+                           content_type='multipart/form-data; boundary=%s' % boundary)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        after = written_bytes()
+    print('/upload-resume peak memory for %d KB upload: %.1f KB (status %d)' % (
+        RESUME_SIZE // 1024, peak / 1024, resp.status_code))
+    if before is not None:
+        # werkzeug spools the file part to its own temp file while parsing the form,
+        # then store_resume copies it into the upload folder
+        print('/upload-resume bytes written for %d KB upload: %d KB (%.1fx)' % (
+            RESUME_SIZE // 1024, (after - before) // 1024, (after - before) / RESUME_SIZE))
+
+
+def bench_throughput():
+    errors = []
+
+    def worker(n):
+        client = app.test_client()
+        # One address per client so the login rate limit doesn't turn users away
+        client.environ_base['REMOTE_ADDR'] = '10.0.1.%d' % n
+        login(client, n)
+        for i in range(UPLOADS_PER_THREAD):
+            data = make_resume(n * UPLOADS_PER_THREAD + i)
+            resp = client.post('/upload-resume', data={'resume': (io.BytesIO(data), 'resume.pdf')},
+                               content_type='multipart/form-data')
+            if resp.status_code not in (200, 201):
+                errors.append(resp.get_json())
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = THREADS * UPLOADS_PER_THREAD
+    print('%d concurrent uploads of %d KB in %.2fs: %.1f uploads/s, %.1f MB/s, %d errors' % (
+        total, RESUME_SIZE // 1024, elapsed, total / elapsed,
+        total * RESUME_SIZE / elapsed / (1024 * 1024), len(errors)))
+
+
+if __name__ == '__main__':
+    app = create_app()
+    bench_memory()
+    bench_throughput()
+    uploads.get_executor().shutdown(wait=True)
@@ -0,0 +1,82 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Run against a throwaway database
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix='12thfailjobs-bench-'))
+
+WORKERS = 8
+
+# What a freshly spawned worker does before it can answer: import, build the app,
+# then serve a catalogue read and a login attempt
+COLD_WORKER = '''
+import sys, time
+started = float(sys.argv[1])
+sys.path.insert(0, %r)
+from app import create_app
+app = create_app()
+client = app.test_client()
+client.get('/get-categories')
+client.post('/login', json={'email': 'bench@example.com', 'password': 'benchpass'})
+print(time.time() - started)
+''' % ROOT
+
+
+def first_requests(app):
+    client = app.test_client()
+    client.get('/get-categories')
+    client.post('/login', json={'email': 'bench@example.com', 'password': 'benchpass'})
+
+
+def bench_cold():
+    timings = []
+    for _ in range(WORKERS):
+        result = subprocess.run([sys.executable, '-c', COLD_WORKER, repr(time.time())],
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def bench_preforked():
+    from app import create_app
+
+    started = time.time()
+    app = create_app({'PRELOAD': True})
+    master = time.time() - started
+
+    timings = []
+    for _ in range(WORKERS):
+        read_fd, write_fd = os.pipe()
+        forked = time.time()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            first_requests(app)
+            os.write(write_fd, repr(time.time() - forked).encode('ascii'))
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            timings.append(float(f.read()))
+        os.waitpid(pid, 0)
+    return master, timings
+
+
+def report(label, timings):
+    print('%-28s median %7.1f ms  max %7.1f ms' % (
+        label, statistics.median(timings) * 1000, max(timings) * 1000))
+
+
+if __name__ == '__main__':
+    # Create the schema first so neither mode pays for it per worker
+    subprocess.run([sys.executable, '-c', 'import sys; sys.path.insert(0, %r); from app import create_app; create_app()' % ROOT],
+                   check=True)
+
+    report('cold worker (spawn)', bench_cold())
+    master, timings = bench_preforked()
+    print('%-28s %7.1f ms (once)' % ('preload in master', master * 1000))
+    report('preloaded worker (fork)', timings)
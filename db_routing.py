@@ -0,0 +1,125 @@
+import sqlite3
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Without flock (Windows) refreshes are only coordinated within a process
+    fcntl = None
+
+
+# Routes read-only queries to a snapshot or replica copy of the primary database
+class ReadRouter:
+    def __init__(self, primary, snapshot=None, replica=None, max_staleness=30.0, refresh_interval=10.0):
+        self.primary = primary
+        # A designated replica is maintained elsewhere; a snapshot is refreshed by us
+        self.replica = replica
+        self.snapshot = None if replica else snapshot
+        self.max_staleness = max_staleness
+        self.refresh_interval = refresh_interval
+        self.refresh_lock = threading.Lock()
+        # A refresh thread does not survive fork, so a lock it held would never be released
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self.refresh_lock = threading.Lock()
+
+    def copy_time(self):
+        # The copy's mtime is its point-in-time, shared by every process on the host
+        path = self.replica or self.snapshot
+        if not path:
+            return None
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def choose(self, last_write=None):
+        copy_time = self.copy_time()
+        if copy_time is None:
+            self.refresh_async()
+            return self.primary
+
+        age = time.time() - copy_time
+        if age > self.refresh_interval:
+            self.refresh_async()
+        if age > self.max_staleness:
+            return self.primary
+        # Read-your-writes: a session that wrote after the copy was taken reads the primary
+        if last_write and last_write >= copy_time:
+            return self.primary
+        return self.replica or self.snapshot
+
+    def connect(self, path=None):
+        path = path or self.primary
+        if path == self.primary:
+            return sqlite3.connect(self.primary)
+        try:
+            conn = sqlite3.connect('file:%s?mode=ro' % path, uri=True)
+            conn.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+            return conn
+        except sqlite3.Error:
+            return sqlite3.connect(self.primary)
+
+    def refresh_snapshot(self, min_age=0):
+        # One process on the host refreshes at a time: the others skip rather than
+        # queue up, and a copy newer than min_age seconds is left alone, so a
+        # refresh that just finished elsewhere is not repeated by every worker
+        if not self.snapshot:
+            return False
+        directory = os.path.dirname(self.snapshot) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with open(self.snapshot + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+            copy_time = self.copy_time()
+            if min_age and copy_time is not None and time.time() - copy_time < min_age:
+                return False
+            self._copy_primary(directory)
+        return True
+
+    def _copy_primary(self, directory):
+        # Copy the primary with the online backup API, then swap the file into place
+        # atomically; readers holding the old file keep a consistent view until they close.
+        # The primary runs in WAL mode, so the backup's read transaction does not
+        # hold off writers while it copies.
+        started = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            source = sqlite3.connect(self.primary, timeout=30)
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(target)
+                # Read-only openers can't create the -shm file a WAL database needs
+                target.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                target.close()
+                source.close()
+            os.utime(tmp_path, (started, started))
+            os.replace(tmp_path, self.snapshot)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def refresh_async(self):
+        if not self.snapshot or not self.refresh_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh_snapshot(min_age=self.refresh_interval)
+            except (sqlite3.Error, OSError):
+                # Reads keep falling back to the primary until a refresh succeeds
+                pass
+            finally:
+                self.refresh_lock.release()
+
+        threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,216 @@
+import sqlite3
+import re
+
+try:
+    import fcntl
+except ImportError:
+    # Without flock (Windows) concurrent backfills repeat each other's work harmlessly
+    fcntl = None
+
+# Pay periods per year for each salary_type
+SALARY_PERIODS = {
+    'hourly': 2080,
+    'daily': 260,
+    'weekly': 52,
+    'monthly': 12,
+    'yearly': 1,
+    'annual': 1
+}
+
+NORMALIZED_COLUMNS = (
+    ('salary_annual_min', 'INTEGER'),
+    ('salary_annual_max', 'INTEGER'),
+    ('experience_min_months', 'INTEGER'),
+    ('experience_max_months', 'INTEGER')
+)
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Bumped whenever normalization changes, so existing rows are recomputed
+RANGES_MIGRATION = 'job_ranges_v2'
+
+# A number with its own unit, if it has one: '1 year', '6 months', '3' (as in '3-5 years')
+EXPERIENCE_QUANTITY = re.compile(r'(\d+(?:\.\d+)?)\s*(?:(years?|yrs?)|(months?|mos?|mths?))?\b')
+EXPERIENCE_COMPOUND_GAP = re.compile(r'^\s*(?:,|and)?\s*$')
+OPEN_ENDED = ('+', 'more', 'above', 'minimum', 'at least', 'atleast')
+UPPER_BOUNDED = ('up to', 'upto', 'less than', 'max', 'under', 'below')
+
+
+# Normalization
+def annualize(amount, salary_type):
+    if amount is None:
+        return None
+    periods = SALARY_PERIODS.get((salary_type or 'monthly').strip().lower())
+    if periods is None:
+        return None
+    return int(round(amount * periods))
+
+
+def parse_experience(text):
+    # '1-3 years' -> (12, 36), '2+ years' -> (24, None), '1 year 6 months' -> (18, 18),
+    # '6 months - 1 year' -> (6, 12), 'Fresher to 2 years' -> (0, 24), 'Fresher' -> (0, 0)
+    if not text:
+        return None, None
+    text = text.strip().lower()
+    fresher = 'fresher' in text or 'no experience' in text
+
+    # (months per unit or None, value, start, end) for each number in the text
+    quantities = []
+    for match in EXPERIENCE_QUANTITY.finditer(text):
+        unit = 12 if match.group(2) else 1 if match.group(3) else None
+        quantities.append([unit, float(match.group(1)), match.start(), match.end()])
+    if not quantities:
+        return (0, 0) if fresher else (None, None)
+
+    # A bare number takes the unit of the next number that has one ('1-3 years'),
+    # else of the previous one, else years
+    for i, quantity in enumerate(quantities):
+        if quantity[0] is None:
+            later = [q[0] for q in quantities[i + 1:] if q[0] is not None]
+            earlier = [q[0] for q in quantities[:i] if q[0] is not None]
+            quantity[0] = later[0] if later else earlier[-1] if earlier else 12
+
+    # '1 year 6 months' is one amount, not a range
+    months = []
+    for i, (unit, value, start, end) in enumerate(quantities):
+        previous = quantities[i - 1] if i else None
+        if (previous and previous[0] == 12 and unit == 1
+                and EXPERIENCE_COMPOUND_GAP.match(text[previous[3]:start])):
+            months[-1] += value
+        else:
+            months.append(value * unit)
+    low, high = int(min(months)), int(max(months))
+
+    if fresher:
+        return 0, None if any(word in text for word in OPEN_ENDED) else high
+    if len(months) > 1:
+        return low, high
+    if any(word in text for word in OPEN_ENDED):
+        return low, None
+    if any(word in text for word in UPPER_BOUNDED):
+        return 0, high
+    return low, high
+
+
+def normalize_job_fields(salary_min, salary_max, salary_type, experience_level):
+    experience_min, experience_max = parse_experience(experience_level)
+    return (annualize(salary_min, salary_type), annualize(salary_max, salary_type),
+            experience_min, experience_max)
+
+
+# Database initialization
+def init_range_columns(cursor):
+    # Older databases predate the normalized columns. Returns True until a backfill
+    # has completed, so one interrupted by a restart is resumed on the next start;
+    # the indexes are built once it finishes. The caller holds the write lock
+    # (BEGIN IMMEDIATE), so the columns read here can't change before the ALTERs.
+    cursor.execute('PRAGMA table_info(jobs)')
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in NORMALIZED_COLUMNS:
+        if name not in existing:
+            cursor.execute('ALTER TABLE jobs ADD COLUMN %s %s' % (name, column_type))
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT 1 FROM schema_migrations WHERE name = ?', (RANGES_MIGRATION,))
+    if cursor.fetchone() is None:
+        return True
+    create_range_indexes(cursor)
+    return False
+
+
+def create_range_indexes(cursor):
+    # A salary filter is an interval overlap (max >= low AND min <= high), so each bound
+    # gets an index led by its own column; the other column is then checked in the index
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_category_salary_max
+        ON jobs (is_active, category_id, salary_annual_max, salary_annual_min)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_category_salary_min
+        ON jobs (is_active, category_id, salary_annual_min, salary_annual_max)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_salary_max
+        ON jobs (is_active, salary_annual_max, salary_annual_min)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_salary_min
+        ON jobs (is_active, salary_annual_min, salary_annual_max)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_category_experience
+        ON jobs (is_active, category_id, experience_min_months, experience_max_months)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_experience
+        ON jobs (is_active, experience_min_months, experience_max_months)
+    ''')
+
+
+# Backfill
+def backfill_job_ranges(db_path, batch_size=BACKFILL_BATCH_SIZE):
+    # Walks jobs by id in batches, one short transaction each, so writers are
+    # never locked out for the whole table. Returns None without doing anything
+    # if another process is already running it.
+    with open(db_path + '.backfill.lock', 'a') as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+        return _backfill_job_ranges(db_path, batch_size)
+
+
+def _backfill_job_ranges(db_path, batch_size):
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    last_id = 0
+    updated = 0
+    try:
+        # It may have finished elsewhere while we waited to start
+        cursor.execute('SELECT 1 FROM schema_migrations WHERE name = ?', (RANGES_MIGRATION,))
+        if cursor.fetchone() is not None:
+            return 0
+
+        # Every row is recomputed, since an earlier normalization may have filled
+        # it differently, but only rows whose values change are written
+        while True:
+            cursor.execute('''
+                SELECT id, salary_min, salary_max, salary_type, experience_level,
+                       salary_annual_min, salary_annual_max, experience_min_months, experience_max_months
+                FROM jobs
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            changes = []
+            for row in rows:
+                fields = normalize_job_fields(*row[1:5])
+                if fields != tuple(row[5:]):
+                    changes.append(fields + (row[0],))
+            cursor.executemany('''
+                UPDATE jobs
+                SET salary_annual_min = ?, salary_annual_max = ?,
+                    experience_min_months = ?, experience_max_months = ?
+                WHERE id = ?
+            ''', changes)
+            conn.commit()
+            updated += len(changes)
+            last_id = rows[-1][0]
+
+        # Building the indexes once over filled columns is far cheaper than
+        # updating them row by row during the backfill
+        create_range_indexes(cursor)
+        cursor.execute('INSERT OR IGNORE INTO schema_migrations (name) VALUES (?)', (RANGES_MIGRATION,))
+        conn.commit()
+    finally:
+        conn.close()
+    return updated
@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session, jsonify
+
+
+# Token bucket backends: consume() returns (allowed, seconds until a token is available)
+class MemoryBackend:
+    def __init__(self, max_keys=100000):
+        # key -> (tokens, updated, full_at), least recently used first. full_at is
+        # when the bucket will have refilled at its own rate, so buckets of limiters
+        # with different rates can share one backend.
+        self.buckets = OrderedDict()
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated, _ = self.buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._prune(now)
+        return allowed, 0 if allowed else (cost - tokens) / rate
+
+    def _prune(self, now):
+        # Only looks at the idle end of the queue, so each call does work in
+        # proportion to the buckets it drops. A bucket that has refilled completely
+        # carries no state worth keeping; past max_keys the idlest goes regardless.
+        while self.buckets:
+            key, (_, _, full_at) = next(iter(self.buckets.items()))
+            if full_at > now and len(self.buckets) <= self.max_keys:
+                break
+            del self.buckets[key]
+
+
+class SQLiteBackend:
+    # Shared across worker processes on one host via a small SQLite file
+    def __init__(self, db_path='ratelimit.db', timeout=0.25, prune_interval=60):
+        self.db_path = db_path
+        # Waiting long on a busy file would stall every request behind the limiter
+        self.timeout = timeout
+        self.prune_interval = prune_interval
+        self.next_prune = 0.0
+        # One connection per process, used by one thread at a time: threads queue
+        # on this lock instead of polling SQLite's, which is left to other processes
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Every worker runs this at startup; the write lock keeps the column check
+        # and the ALTER together
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                full_at REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        if 'full_at' not in {row[1] for row in conn.execute('PRAGMA table_info(rate_buckets)')}:
+            conn.execute('ALTER TABLE rate_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_buckets_full_at ON rate_buckets (full_at)')
+        conn.commit()
+        conn.close()
+
+    def _connection(self):
+        # A connection inherited across fork must not be used by the child
+        if self.conn is None or self.pid != os.getpid():
+            self.conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None,
+                                        check_same_thread=False)
+            # Bucket state is disposable, so skip the fsync on every commit
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.pid = os.getpid()
+        return self.conn
+
+    def consume(self, key, rate, capacity, cost=1):
+        with self.lock:
+            return self._consume(self._connection(), key, rate, capacity, cost)
+
+    def _consume(self, conn, key, rate, capacity, cost):
+        now = time.time()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute('''
+                INSERT INTO rate_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at
+            ''', (key, tokens, now, now + (capacity - tokens) / rate))
+            # Buckets that have refilled completely carry no state worth keeping
+            if now >= self.next_prune:
+                self.next_prune = now + self.prune_interval
+                conn.execute('DELETE FROM rate_buckets WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        return allowed, 0 if allowed else (cost - tokens) / rate
+
+
+# Per-endpoint limiter
+class RateLimiter:
+    def __init__(self, backend, name, rate, capacity):
+        self.backend = backend
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.allowed = 0
+        self.shed = 0
+        self.failed_open = 0
+        self.lock = threading.Lock()
+
+    def hit(self, key):
+        try:
+            allowed, retry_after = self.backend.consume('%s:%s' % (self.name, key), self.rate, self.capacity)
+        except sqlite3.Error:
+            # Fail open: a bucket store that is locked or broken must not take the
+            # endpoint down with it
+            with self.lock:
+                self.failed_open += 1
+            return True, 0
+        with self.lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.shed += 1
+        return allowed, retry_after
+
+    def stats(self):
+        with self.lock:
+            return {'allowed': self.allowed, 'shed': self.shed, 'failed_open': self.failed_open}
+
+
+def client_key():
+    # Logged-in users get their own bucket; everyone else is keyed by address
+    if 'user_id' in session:
+        return 'user:%s' % session['user_id']
+    return ip_key()
+
+
+def ip_key():
+    return 'ip:%s' % request.remote_addr
+
+
+def limited(name, key_func=client_key):
+    # Limiters are built per app by the factory and looked up by name at request time
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions['rate_limiters'][name]
+            allowed, retry_after = limiter.hit(key_func())
+            if not allowed:
+                response = jsonify({'success': False, 'error': 'Too many requests, please try again shortly'})
+                response.headers['Retry-After'] = str(int(retry_after) + 1)
+                return response, 429
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Request coalescing
+class SingleFlight:
+    # Concurrent calls with the same key run fn once and share its result
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self.calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call['done'].set()
+
+    def stats(self):
+        with self.lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self.calls)}
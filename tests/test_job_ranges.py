@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_ranges import RANGES_MIGRATION, backfill_job_ranges, parse_experience
+
+
+@pytest.mark.parametrize('text, expected', [
+    # Each number carries its own unit
+    ('1 year 6 months', (18, 18)),
+    ('1 year and 6 months', (18, 18)),
+    ('6 months - 1 year', (6, 12)),
+    ('3 years 6 months - 5 years', (42, 60)),
+    # 'fresher' only decides the answer on its own; with numbers it is the lower bound
+    ('Fresher to 2 years', (0, 24)),
+    ('Freshers / 1-2 years', (0, 24)),
+    ('Fresher or 2+ years', (0, None)),
+    ('Fresher', (0, 0)),
+    ('No experience required', (0, 0)),
+    # Two bounds spelled out as words
+    ('Minimum 2 years, maximum 5 years', (24, 60)),
+    ('Minimum 3 years', (36, None)),
+    # Ranges, where a bare number borrows the unit that follows it
+    ('1-3 years', (12, 36)),
+    ('0-2 years', (0, 24)),
+    ('1 to 3 years', (12, 36)),
+    ('5-10 years', (60, 120)),
+    # Single amounts and open or upper-bounded ones
+    ('6 months', (6, 6)),
+    ('1.5 years', (18, 18)),
+    ('2 yrs', (24, 24)),
+    ('2+ years', (24, None)),
+    ('up to 2 years', (0, 24)),
+    ('less than 1 year', (0, 12)),
+    # Nothing to go on
+    ('Any', (None, None)),
+    ('', (None, None)),
+    (None, (None, None)),
+])
+def test_parse_experience(text, expected):
+    assert parse_experience(text) == expected
+
+
+def test_backfill_recomputes_rows_filled_by_an_older_parser(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY, category_id INTEGER, is_active BOOLEAN DEFAULT 1,
+            salary_min INTEGER, salary_max INTEGER, salary_type TEXT, experience_level TEXT,
+            salary_annual_min INTEGER, salary_annual_max INTEGER,
+            experience_min_months INTEGER, experience_max_months INTEGER
+        )
+    ''')
+    conn.execute('CREATE TABLE schema_migrations (name TEXT PRIMARY KEY, completed_at TIMESTAMP)')
+    conn.executemany('''
+        INSERT INTO jobs (salary_min, salary_max, salary_type, experience_level,
+                          salary_annual_min, salary_annual_max, experience_min_months, experience_max_months)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (10000, 20000, 'monthly', '1 year 6 months', 120000, 240000, 1, 1),
+        (10000, 20000, 'monthly', '1-3 years', 120000, 240000, 12, 36),
+        (10000, 20000, 'monthly', '6 months - 1 year', None, None, None, None),
+    ])
+    conn.commit()
+
+    assert backfill_job_ranges(db_path) == 2
+    rows = conn.execute('SELECT experience_min_months, experience_max_months FROM jobs ORDER BY id').fetchall()
+    assert rows == [(18, 18), (12, 36), (6, 12)]
+    assert conn.execute('SELECT name FROM schema_migrations').fetchall() == [(RANGES_MIGRATION,)]
+    conn.close()
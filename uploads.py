@@ -0,0 +1,301 @@
+import sqlite3
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+UPLOAD_FOLDER = os.path.join('uploads', 'resumes')
+MAX_RESUME_SIZE = 5 * 1024 * 1024
+ALLOWED_EXTENSIONS = {'.pdf', '.doc', '.docx', '.txt'}
+CHUNK_SIZE = 64 * 1024
+PREVIEW_LENGTH = 500
+MAX_ATTEMPTS = 3
+DRAIN_INTERVAL = 60
+STALE_JOB_TIMEOUT = 10 * 60
+
+_executor = None
+_next_drain = 0.0
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# Database initialization
+def init_upload_tables(cursor):
+    # Stored resume files, one row per distinct content hash
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sha256 TEXT UNIQUE NOT NULL,
+            path TEXT NOT NULL,
+            original_name TEXT,
+            content_type TEXT,
+            size INTEGER NOT NULL,
+            extracted_text TEXT,
+            preview TEXT,
+            status TEXT DEFAULT 'pending',
+            uploaded_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (uploaded_by) REFERENCES users (id)
+        )
+    ''')
+
+    # Persisted background job queue for resume processing
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            resume_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (resume_id) REFERENCES resume_files (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resume_jobs_status ON resume_jobs (status)')
+
+    # Shared deadline for the periodic queue drain, so one process runs it per interval
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_queue_state (
+            name TEXT PRIMARY KEY,
+            next_drain_at REAL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO resume_queue_state (name) VALUES ('resume_jobs')")
+
+    # Which users may attach or inspect a stored file; a deduplicated upload
+    # adds the uploader here without creating a second file
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_resumes (
+            user_id INTEGER NOT NULL,
+            resume_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, resume_id),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (resume_id) REFERENCES resume_files (id)
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO user_resumes (user_id, resume_id)
+        SELECT uploaded_by, id FROM resume_files WHERE uploaded_by IS NOT NULL
+    ''')
+
+
+# Storage helpers
+def allowed_resume(filename):
+    return os.path.splitext(filename or '')[1].lower() in ALLOWED_EXTENSIONS
+
+
+def stream_to_disk(stream, upload_folder=UPLOAD_FOLDER, max_size=MAX_RESUME_SIZE):
+    # Copy the upload in fixed-size chunks, hashing as we go, so no more than
+    # one chunk of the file is held in memory at a time
+    os.makedirs(upload_folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadError('Resume must be smaller than %d MB' % (max_size // (1024 * 1024)), 413)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    if size == 0:
+        os.remove(tmp_path)
+        raise UploadError('Resume file is empty')
+
+    return tmp_path, digest.hexdigest(), size
+
+
+def add_resume_owner(cursor, user_id, resume_id):
+    if user_id is not None:
+        cursor.execute('INSERT OR IGNORE INTO user_resumes (user_id, resume_id) VALUES (?, ?)', (user_id, resume_id))
+
+
+def store_resume(db_path, file_storage, user_id=None, upload_folder=UPLOAD_FOLDER, max_size=MAX_RESUME_SIZE):
+    # Returns (resume_id, path, is_new); identical content is stored only once
+    if not file_storage or not file_storage.filename:
+        raise UploadError('Resume file is required')
+    if not allowed_resume(file_storage.filename):
+        raise UploadError('Resume must be a PDF, DOC, DOCX or TXT file')
+
+    tmp_path, sha256, size = stream_to_disk(file_storage.stream, upload_folder, max_size)
+    ext = os.path.splitext(file_storage.filename)[1].lower()
+    final_path = os.path.join(upload_folder, sha256 + ext)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT id, path FROM resume_files WHERE sha256 = ?', (sha256,))
+        existing = cursor.fetchone()
+        if existing:
+            os.remove(tmp_path)
+            add_resume_owner(cursor, user_id, existing[0])
+            conn.commit()
+            return existing[0], existing[1], False
+
+        os.replace(tmp_path, final_path)
+        cursor.execute('''
+            INSERT OR IGNORE INTO resume_files (sha256, path, original_name, content_type, size, uploaded_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (sha256, final_path, file_storage.filename, file_storage.mimetype, size, user_id))
+        is_new = cursor.rowcount == 1
+        conn.commit()
+
+        # Lost a race with a concurrent upload of the same content
+        cursor.execute('SELECT id, path FROM resume_files WHERE sha256 = ?', (sha256,))
+        resume_id, path = cursor.fetchone()
+        add_resume_owner(cursor, user_id, resume_id)
+        conn.commit()
+        return resume_id, path, is_new
+    finally:
+        conn.close()
+
+
+# Background processing
+def extract_text(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if path.endswith('.txt'):
+        return raw.decode('utf-8', errors='replace')
+    # Binary formats: keep runs of printable text, as `strings` would
+    runs = re.findall(rb'[\x20-\x7e]{4,}', raw)
+    return '\n'.join(run.decode('ascii') for run in runs)
+
+
+def process_resume_job(base_dir, db_path, job_id):
+    # Workers don't share the server's working directory, so paths are resolved here
+    conn = sqlite3.connect(os.path.join(base_dir, db_path), timeout=30)
+    cursor = conn.cursor()
+    try:
+        # Claim the job; another worker may have picked it up already
+        cursor.execute('''
+            UPDATE resume_jobs SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'pending'
+        ''', (job_id,))
+        conn.commit()
+        if cursor.rowcount == 0:
+            return False
+
+        cursor.execute('''
+            SELECT r.id, r.path FROM resume_jobs rj
+            JOIN resume_files r ON rj.resume_id = r.id
+            WHERE rj.id = ?
+        ''', (job_id,))
+        resume_id, path = cursor.fetchone()
+
+        try:
+            text = extract_text(os.path.join(base_dir, path))
+        except Exception as e:
+            cursor.execute('''
+                UPDATE resume_jobs
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (MAX_ATTEMPTS, str(e), job_id))
+            cursor.execute('''
+                UPDATE resume_files SET status = 'failed'
+                WHERE id = ? AND (SELECT status FROM resume_jobs WHERE id = ?) = 'failed'
+            ''', (resume_id, job_id))
+            conn.commit()
+            return False
+
+        preview = ' '.join(text.split())[:PREVIEW_LENGTH]
+        cursor.execute('''
+            UPDATE resume_files SET extracted_text = ?, preview = ?, status = 'processed' WHERE id = ?
+        ''', (text, preview, resume_id))
+        cursor.execute('''
+            UPDATE resume_jobs SET status = 'done', error = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (job_id,))
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+def get_executor(max_workers=None):
+    global _executor
+    if _executor is None:
+        # Imported here so workers that never see an upload don't pay for it
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # The server is multi-threaded; forking it directly can copy a lock that
+        # another thread holds and hang the child, so fork from a clean server process
+        _executor = ProcessPoolExecutor(max_workers=max_workers or 2,
+                                        mp_context=multiprocessing.get_context('forkserver'))
+    return _executor
+
+
+def enqueue_resume(db_path, resume_id):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO resume_jobs (resume_id) VALUES (?)', (resume_id,))
+    job_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+
+    get_executor().submit(process_resume_job, os.getcwd(), db_path, job_id)
+    return job_id
+
+
+def resume_pending_jobs(db_path, stale_after=None):
+    # Requeue work left behind by a crashed or restarted server, then submit
+    # everything pending, including failed attempts waiting for a retry.
+    # With stale_after, only jobs stuck running that long are requeued, since
+    # other live processes may still be working on the rest.
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    if stale_after is None:
+        cursor.execute('''
+            UPDATE resume_jobs SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+            WHERE status = 'running' AND attempts < ?
+        ''', (MAX_ATTEMPTS,))
+    else:
+        cursor.execute('''
+            UPDATE resume_jobs SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+            WHERE status = 'running' AND attempts < ? AND updated_at < datetime('now', ?)
+        ''', (MAX_ATTEMPTS, '-%d seconds' % stale_after))
+    cursor.execute("SELECT id FROM resume_jobs WHERE status = 'pending' ORDER BY id")
+    job_ids = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    conn.close()
+
+    for job_id in job_ids:
+        get_executor().submit(process_resume_job, os.getcwd(), db_path, job_id)
+    return len(job_ids)
+
+
+def maybe_resume_pending_jobs(db_path, interval=DRAIN_INTERVAL):
+    # Called on every request: a clock check per process, then only the process
+    # that moves the shared deadline forward drains the queue this interval
+    global _next_drain
+    now = time.time()
+    if now < _next_drain:
+        return 0
+    _next_drain = now + interval
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE resume_queue_state SET next_drain_at = ?
+        WHERE name = 'resume_jobs' AND next_drain_at <= ?
+    ''', (now + interval, now))
+    claimed = cursor.rowcount == 1
+    conn.commit()
+    conn.close()
+    if not claimed:
+        return 0
+    return resume_pending_jobs(db_path, stale_after=STALE_JOB_TIMEOUT)